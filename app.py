@@ -1,12 +1,15 @@
 import os
 import re
+import logging
+from functools import lru_cache
 from datetime import datetime
 import streamlit as st
-from arxiv_fetcher import fetch_papers
+from arxiv_fetcher import fetch_papers, partition_arxiv_ids
 from paper_display import display_papers_with_pagination
-from paper_download import bulk_download
+from paper_download import bulk_download, zip_export
 from authentication import register_user, login_user
 from db_manager import init_db
+from paper_store import store_papers, lookup_papers, refresh_cached_results
 
 
 # Function to sanitize filenames and folder names
@@ -14,7 +17,10 @@ def sanitize_filename(name):
     return re.sub(r'[^\w\-_\. ]', '_', name)  # Replace non-alphanumeric characters with underscores
 
 def main():
-    # Initialize the database
+    # Configure logging here rather than at import time in library modules
+    logging.basicConfig(level=os.environ.get('PAPERPAT_LOG_LEVEL', 'INFO'))
+
+    # Bring the database schema up to date (a no-op after the first run in this process)
     init_db()
 
 
@@ -66,10 +72,13 @@ def apply_theme(theme):
     else:
         css_file = 'css/coding_theme.css'  # Default to Coding theme
 
-    # Read the CSS file
-    with open(css_file) as f:
-        css = f"<style>{f.read()}</style>"
-    st.markdown(css, unsafe_allow_html=True)
+    st.markdown(load_css(css_file), unsafe_allow_html=True)
+
+# Read a theme CSS file once per process instead of on every rerun
+@lru_cache(maxsize=None)
+def load_css(css_file):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), css_file)) as f:
+        return f"<style>{f.read()}</style>"
 
 def display_login_page():
     st.title("🔑Login🔑")
@@ -175,8 +184,8 @@ def display_search_page():
 
     if search_button and query.strip():
         # Clear previous search results
-        st.session_state.papers = []
-        st.session_state.selected_papers = []
+        st.session_state.papers = ()
+        st.session_state.selected_papers = ()
 
         # Store the query in session state
         st.session_state.query = query
@@ -192,8 +201,41 @@ def display_search_page():
             )
 
         if papers_response:
-            # Store the fetched papers in session state
-            st.session_state.papers = papers_response
+            # Keep only the arxiv ids in session state; metadata lives in the shared paper store
+            st.session_state.papers = store_papers(papers_response)
+            st.session_state.current_page = 0
+
+    # Look up a known list of arXiv IDs, e.g. an imported reading list
+    with st.expander("📋 Look Up arXiv IDs"):
+        id_text = st.text_area("arXiv IDs (one per line or comma separated)", key="arxiv_id_list")
+        col1, col2 = st.columns(2)
+        with col1:
+            lookup_button = st.button("Look Up IDs")
+        with col2:
+            refresh_button = st.button("Refresh Cached Metadata")
+
+    if lookup_button:
+        arxiv_ids, invalid_ids = partition_arxiv_ids(re.split(r'[\s,]+', id_text))
+        if invalid_ids:
+            st.warning(f"Skipped {len(invalid_ids)} entries that are not valid arXiv IDs: {', '.join(invalid_ids)}")
+        if arxiv_ids:
+            st.session_state.selected_papers = ()
+            # No search query: keeps hydration off cached_results and names downloads separately
+            st.session_state.query = None
+            with st.spinner(f"Looking up {len(arxiv_ids)} arXiv IDs..."):
+                paper_ids, updates = lookup_papers(arxiv_ids)
+            st.session_state.papers = paper_ids
+            st.session_state.current_page = 0
+            st.info(f"Found {len(paper_ids)} of {len(arxiv_ids)} papers.")
+            for old_id, new_id in updates:
+                st.info(f"New version available: {old_id} → {new_id}")
+        else:
+            st.warning("Enter at least one valid arXiv ID.")
+
+    if refresh_button:
+        with st.spinner("Refreshing cached paper metadata..."):
+            updates = refresh_cached_results()
+        st.success(f"Cached metadata refreshed; {len(updates)} papers have a new version.")
 
     # Display paginated papers and download options
     if 'papers' in st.session_state and st.session_state.papers:
@@ -204,6 +246,13 @@ def display_search_page():
         if st.button("Select All Papers and Download"):
             st.session_state.selected_papers = st.session_state.papers
             bulk_download(st.session_state.papers, st.session_state.query)  # Use query from session state
+
+        # Option to export the selected papers as a ZIP streamed to the browser
+        if st.button("Export Selected Papers as ZIP"):
+            if selected_papers:
+                zip_export(selected_papers, st.session_state.query)
+            else:
+                st.warning("Select at least one paper to export.")
         st.markdown("</div>", unsafe_allow_html=True)
 
 if __name__ == "__main__":
@@ -6,9 +6,15 @@ import streamlit as st
 import logging
 from db_manager import get_connection
 import json
+import re
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Number of ids sent per arXiv API request when looking papers up by id
+ID_LIST_CHUNK_SIZE = 400
+
+# New-style (2401.01234) and old-style (hep-th/9901001, math.AG/0601001) arXiv ids, without version
+ARXIV_ID_PATTERN = re.compile(r'^(\d{4}\.\d{4,5}|[a-z]+(-[a-z]+)*(\.[A-Z]{2})?/\d{7})$')
+
+# Module logger; logging is configured by the application, not at import time
 logger = logging.getLogger(__name__)
 
 def save_search_history(user_id, query):
@@ -45,6 +51,127 @@ def save_cached_results(query, results):
     except Exception as e:
         st.error(f"Error saving cached results: {e}")
 
+def get_all_cached_results():
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT query, results FROM cached_results')
+        rows = cursor.fetchall()
+        conn.close()
+        return {query: json.loads(results) for query, results in rows}
+    except Exception as e:
+        st.error(f"Error retrieving cached results: {e}")
+        return {}
+
+def get_stored_papers(arxiv_ids):
+    try:
+        base_ids = list({split_arxiv_id(arxiv_id)[0] for arxiv_id in arxiv_ids})
+        conn = get_connection()
+        cursor = conn.cursor()
+        papers = {}
+        # Stay well below SQLite's bound parameter limit
+        for i in range(0, len(base_ids), 500):
+            chunk = base_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'SELECT arxiv_id, data FROM papers WHERE arxiv_id IN ({placeholders})', chunk)
+            papers.update((base_id, json.loads(data)) for base_id, data in cursor.fetchall())
+        conn.close()
+        return papers
+    except Exception as e:
+        st.error(f"Error retrieving stored papers: {e}")
+        return {}
+
+def save_stored_papers(papers):
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        rows = []
+        for paper in papers:
+            base_id, version = split_arxiv_id(paper['arxiv_id'])
+            rows.append((base_id, version, json.dumps(paper)))
+        cursor.executemany(
+            'INSERT OR REPLACE INTO papers (arxiv_id, version, data, updated) VALUES (?, ?, ?, CURRENT_TIMESTAMP)',
+            rows
+        )
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        st.error(f"Error saving papers: {e}")
+
+def split_arxiv_id(arxiv_id):
+    """
+    Splits an arXiv id such as '2401.01234v2' or 'https://arxiv.org/abs/hep-th/9901001v1'
+    into its base id and version number (None when unversioned).
+    """
+    arxiv_id = arxiv_id.strip().rstrip('/')
+    arxiv_id = re.sub(r'^(https?://(www\.|export\.)?arxiv\.org/(abs|pdf)/|arxiv:)', '', arxiv_id, flags=re.IGNORECASE)
+    arxiv_id = re.sub(r'\.pdf$', '', arxiv_id)
+    match = re.match(r'^(.+?)v(\d+)$', arxiv_id)
+    if match:
+        return match.group(1), int(match.group(2))
+    return arxiv_id, None
+
+def is_valid_arxiv_id(arxiv_id):
+    return bool(ARXIV_ID_PATTERN.match(split_arxiv_id(arxiv_id)[0]))
+
+def partition_arxiv_ids(arxiv_ids):
+    """
+    Normalises user supplied arXiv ids and URLs.
+    Returns:
+        valid (list): Unique base ids in input order.
+        invalid (list): Input entries that are not well-formed arXiv ids.
+    """
+    valid = {}
+    invalid = []
+    for arxiv_id in arxiv_ids:
+        if not arxiv_id.strip():
+            continue
+        if is_valid_arxiv_id(arxiv_id):
+            valid[split_arxiv_id(arxiv_id)[0]] = None
+        else:
+            invalid.append(arxiv_id)
+    return list(valid), invalid
+
+def result_to_paper(result, category=None):
+    return {
+        'title': result.title,
+        'authors': ', '.join(author.name for author in result.authors),
+        'published': result.published.strftime('%Y-%m-%d'),
+        'summary': result.summary,
+        'arxiv_url': result.entry_id,
+        'pdf_url': result.pdf_url,
+        'arxiv_id': result.get_short_id(),
+        'abstract': result.summary,
+        'category': category or 'N/A'
+    }
+
+def fetch_papers_by_ids(arxiv_ids, chunk_size=ID_LIST_CHUNK_SIZE):
+    """
+    Fetches the latest metadata for a list of arXiv ids using batched id_list queries.
+    Returns:
+        papers (dict): Paper dicts keyed by base arXiv id; unknown ids are left out.
+    """
+    # arXiv rejects a whole id_list request on a single malformed id, so only well-formed ids are sent
+    base_ids, invalid = partition_arxiv_ids(arxiv_ids)
+    if invalid:
+        logger.warning("Skipping %d malformed arXiv ids: %s", len(invalid), ', '.join(invalid[:10]))
+
+    # One API request per chunk: the page size matches the chunk size
+    client = arxiv.Client(page_size=chunk_size)
+    papers = {}
+    for i in range(0, len(base_ids), chunk_size):
+        chunk = base_ids[i:i + chunk_size]
+        search = arxiv.Search(id_list=chunk, max_results=len(chunk))
+        try:
+            for result in client.results(search):
+                paper = result_to_paper(result, result.primary_category)
+                papers[split_arxiv_id(paper['arxiv_id'])[0]] = paper
+        except Exception as e:
+            logger.warning("arXiv id lookup failed for %d ids: %s", len(chunk), e)
+            st.warning(f"Error looking up {len(chunk)} arXiv ids: {e}")
+    logger.debug("Looked up %d of %d arXiv ids", len(papers), len(base_ids))
+    return papers
+
 def fetch_papers(query, from_date_str, to_date_str, category=None, max_results=1000):
     if st.session_state.get('logged_in'):
         user_id = st.session_state['user_id']
@@ -82,18 +209,8 @@ def fetch_papers(query, from_date_str, to_date_str, category=None, max_results=1
         for result in search.results():
             published_date = result.published.date()
             if from_date <= published_date <= to_date:
-                paper = {
-                    'title': result.title,
-                    'authors': ', '.join(author.name for author in result.authors),
-                    'published': result.published.strftime('%Y-%m-%d'),
-                    'summary': result.summary,
-                    'arxiv_url': result.entry_id,
-                    'pdf_url': result.pdf_url,
-                    'arxiv_id': result.get_short_id(),
-                    'abstract': result.summary,
-                    'category': category or 'N/A'
-                }
-                logger.debug(f"Fetched paper: {paper['title']}, PDF URL: {paper['pdf_url']}")
+                paper = result_to_paper(result, category)
+                logger.debug("Fetched paper: %s, PDF URL: %s", paper['title'], paper['pdf_url'])
                 papers.append(paper)
         
         # Save results to cache
@@ -1,7 +1,69 @@
 import sqlite3
+import threading
 
 DB_NAME = 'app.db'
 
+# Ordered schema migrations; each entry is (version, statements) and is applied exactly once.
+# The applied version is recorded in the database with PRAGMA user_version.
+MIGRATIONS = [
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS search_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            query TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            paper_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS cached_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            query TEXT UNIQUE NOT NULL,
+            results TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        ''',
+    ]),
+    (2, [
+        'CREATE INDEX IF NOT EXISTS idx_search_history_user ON search_history (user_id, timestamp);',
+        'CREATE INDEX IF NOT EXISTS idx_user_interactions_user ON user_interactions (user_id, paper_id);',
+    ]),
+    (3, [
+        '''
+        CREATE TABLE IF NOT EXISTS papers (
+            arxiv_id TEXT PRIMARY KEY,
+            version INTEGER,
+            data TEXT NOT NULL,
+            updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        ''',
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Set once the schema is known to be current, so Streamlit reruns skip the check
+_db_ready = False
+_db_lock = threading.Lock()
+
 def get_connection():
     """
     Establishes a connection to the SQLite database.
@@ -11,54 +73,57 @@ def get_connection():
     conn = sqlite3.connect(DB_NAME)
     return conn
 
-def init_db():
+def get_schema_version(conn):
     """
-    Initializes the database by creating necessary tables if they do not exist.
+    Returns the schema version recorded in the database (0 for a new database).
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Create Users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password_hash TEXT NOT NULL
-    );
-    ''')
+    return conn.execute('PRAGMA user_version').fetchone()[0]
 
-    # Create Search History table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS search_history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        query TEXT NOT NULL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    );
-    ''')
+def migrate(conn):
+    """
+    Applies all pending migrations in order, each in its own transaction.
+    A failing migration is rolled back completely and leaves the recorded version unchanged.
+    Returns:
+        version (int): The schema version after migrating.
+    """
+    version = get_schema_version(conn)
 
-    # Create User Interactions table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS user_interactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        paper_id TEXT NOT NULL,
-        action TEXT NOT NULL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    );
-    ''')
+    # sqlite3's legacy transaction handling does not open a transaction for DDL,
+    # so switch to autocommit mode and manage BEGIN/COMMIT explicitly
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for target, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            conn.execute('BEGIN')
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(target)}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            version = target
+    finally:
+        conn.isolation_level = isolation_level
+    return version
 
-    # Create Cached Results table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS cached_results (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        query TEXT UNIQUE NOT NULL,
-        results TEXT NOT NULL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    ''')
+def init_db():
+    """
+    Brings the database schema up to date. Only the first call in a process touches the database.
+    """
+    global _db_ready
+    if _db_ready:
+        return
 
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with _db_lock:
+        if _db_ready:
+            return
+        conn = get_connection()
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        _db_ready = True
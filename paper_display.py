@@ -1,33 +1,26 @@
 import streamlit as st
 from paper_download import download_pdf
-from datetime import datetime
-import os
 from db_manager import get_connection
+from paper_store import hydrate_papers
 import re
 
-# Function to display papers with pagination
-def display_papers_with_pagination(papers, items_per_page=10):
+# Function to display papers with pagination; paper_ids is a sequence of arxiv ids
+def display_papers_with_pagination(paper_ids, items_per_page=10):
     # The custom CSS is now handled in app.py based on the selected theme
 
     # Initialize session state for pagination
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = 0
 
-    total_pages = (len(papers) - 1) // items_per_page + 1  # Calculate total number of pages
+    total_pages = (len(paper_ids) - 1) // items_per_page + 1  # Calculate total number of pages
 
-    # Get the current page of papers
+    # Hydrate only the current page of papers from the shared store
     start_idx = st.session_state['current_page'] * items_per_page
-    end_idx = min(start_idx + items_per_page, len(papers))
-    papers_to_display = papers[start_idx:end_idx]
+    end_idx = min(start_idx + items_per_page, len(paper_ids))
+    papers_to_display = hydrate_papers(paper_ids[start_idx:end_idx], st.session_state.get('query'))
 
     selected_papers = []
 
-    # Retrieve query from session state
-    query = st.session_state['query'] if 'query' in st.session_state else 'query'
-    folder_name = sanitize_filename(f"{query}_{datetime.now().strftime('%Y-%m-%d')}")
-    if not os.path.exists(folder_name):
-        os.makedirs(folder_name)
-
     # Display papers for the current page
     cols = st.columns(2)  # Display in 2-column format for better readability
     for i, paper in enumerate(papers_to_display):
@@ -4,15 +4,62 @@ import requests
 from datetime import datetime
 import streamlit as st
 import re
-from time import sleep
+import logging
+import secrets
+import tempfile
+import threading
+import zipfile
+from urllib.parse import quote
+from time import sleep, time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from paper_store import hydrate_papers
 
-# Define the base download path
-BASE_PATH = "/Volumes/Research Papers/arxiv/"
+# Legacy download location on the original macOS research volume
+LEGACY_BASE_PATH = "/Volumes/Research Papers/arxiv/"
 
-# Create necessary folders if they don't exist
-os.makedirs(os.path.join(BASE_PATH, "bulk_download"), exist_ok=True)
-os.makedirs(os.path.join(BASE_PATH, "singlepaper"), exist_ok=True)
+# Environment variable that overrides the download location
+BASE_PATH_ENV = "PAPERPAT_DOWNLOAD_PATH"
+
+# Resolved lazily by get_base_path(); nothing touches the filesystem at import time
+BASE_PATH = None
+
+# Chunk size used when streaming PDFs into a ZIP export
+ZIP_CHUNK_SIZE = 64 * 1024
+
+# Folder name prefix for downloads from arXiv id lookups, which have no search query
+ID_LOOKUP_FOLDER = "_id_lookup"
+
+# URL prefix of the streaming ZIP export route and how long an export link stays valid (seconds)
+ZIP_EXPORT_PATH = "/api/export"
+ZIP_EXPORT_TTL = 15 * 60
+
+logger = logging.getLogger(__name__)
+
+# Function to resolve the download root on first use
+def get_base_path():
+    global BASE_PATH
+    if BASE_PATH is None:
+        base_path = os.environ.get(BASE_PATH_ENV)
+        if not base_path:
+            # Keep the original volume when it is mounted, otherwise fall back to the user's home
+            if os.path.isdir(os.path.dirname(LEGACY_BASE_PATH.rstrip("/"))):
+                base_path = LEGACY_BASE_PATH
+            else:
+                base_path = os.path.join(os.path.expanduser("~"), "arxiv")
+        BASE_PATH = base_path
+    return BASE_PATH
+
+# Function to build a path under the download root, creating the folder if needed
+def get_download_folder(*parts):
+    folder_name = os.path.join(get_base_path(), *parts)
+    os.makedirs(folder_name, exist_ok=True)
+    return folder_name
+
+# Function to build the bulk download folder name for a query (None for arXiv id lookups)
+def bulk_folder_path(query):
+    # sanitize_filename strips leading underscores, so no search query can produce this name
+    sanitized_query = sanitize_filename(query) if query is not None else ID_LOOKUP_FOLDER
+    return os.path.join(get_base_path(), "bulk_download", f"{sanitized_query}_{datetime.now().strftime('%Y-%m-%d')}")
 
 # Function to sanitize filenames and folder names
 def sanitize_filename(name):
@@ -21,43 +68,58 @@ def sanitize_filename(name):
     return sanitized_name
 
 
+# Function to fetch a PDF to file_path with retries and file size check; returns True on success
+def fetch_pdf_to_file(paper, file_path, on_retry=None, attempts=3):
+    pdf_url = paper['pdf_url']  # Use the direct PDF URL
+
+    for attempt in range(attempts):
+        response = requests.get(pdf_url, stream=True, timeout=30)
+        try:
+            if response.status_code == 200 and 'application/pdf' in response.headers.get('Content-Type', ''):
+                with open(file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=ZIP_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+
+                # Check if the file size is larger than a small threshold (to prevent corrupted files)
+                if os.path.getsize(file_path) > 10 * 1024:  # File size should be larger than 10KB
+                    return True
+                message = f"File too small for '{paper['title']}', retrying..."
+            else:
+                message = f"Failed to download '{paper['title']}' (status code: {response.status_code}), retrying..."
+        finally:
+            response.close()
+
+        if on_retry:
+            on_retry(message)
+        sleep(1)  # Delay before retrying
+
+    # Do not leave a truncated or empty file behind
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    return False
+
+
 # Function to download a single PDF with retries and file size check
 def download_pdf(paper, folder_name=None):
     # Determine if this is a single paper download and set the appropriate folder
     if folder_name is None:
-        folder_name = os.path.join(BASE_PATH, "singlepaper")
-    
+        folder_name = get_download_folder("singlepaper")
+
     # Create the folder if it doesn't exist
     if not os.path.exists(folder_name):
         os.makedirs(folder_name)
 
     sanitized_title = sanitize_filename(paper['title'])
     file_path = os.path.join(folder_name, f"{sanitized_title}.pdf")
-    pdf_url = paper['pdf_url']  # Use the direct PDF URL
 
     try:
-        for attempt in range(3):  # Retry up to 3 times
-            response = requests.get(pdf_url, stream=True)
-            if response.status_code == 200 and 'application/pdf' in response.headers.get('Content-Type', ''):
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        if chunk:
-                            f.write(chunk)
+        if fetch_pdf_to_file(paper, file_path, on_retry=st.warning):
+            # Generate and save BibTeX file for the single paper
+            bibtex_content = generate_bibtex([paper])  # Pass a list with the single paper
+            save_bibtex_file(bibtex_content, folder_name)
 
-                # Check if the file size is larger than a small threshold (to prevent corrupted files)
-                if os.path.getsize(file_path) > 10 * 1024:  # File size should be larger than 10KB
-                    # Generate and save BibTeX file for the single paper
-                    bibtex_content = generate_bibtex([paper])  # Pass a list with the single paper
-                    save_bibtex_file(bibtex_content, folder_name)
-                    
-                    return sanitized_title  # Successfully downloaded
-                else:
-                    # Retry if the file size is too small
-                    st.warning(f"File too small for '{paper['title']}', retrying...")
-            else:
-                st.warning(f"Failed to download '{paper['title']}' (status code: {response.status_code}), retrying...")
-
-            sleep(1)  # Delay before retrying
+            return sanitized_title  # Successfully downloaded
 
         st.error(f"Failed to download '{paper['title']}' after 3 attempts.")
         return None  # Return None if the file couldn't be downloaded correctly
@@ -67,10 +129,10 @@ def download_pdf(paper, folder_name=None):
         return None
 
 
-# Function to bulk download selected papers using multithreading (no changes needed)
-def bulk_download(papers, query):
-    sanitized_query = sanitize_filename(query)
-    folder_name = os.path.join(BASE_PATH, "bulk_download", f"{sanitized_query}_{datetime.now().strftime('%Y-%m-%d')}")
+# Function to bulk download selected papers (given as arxiv ids) using multithreading
+def bulk_download(paper_ids, query):
+    papers = hydrate_papers(paper_ids, query)
+    folder_name = bulk_folder_path(query)
     if not os.path.exists(folder_name):
         os.makedirs(folder_name)
 
@@ -148,9 +210,7 @@ def save_bibtex_file(bibtex_content, folder_name):
 # New function for single paper download
 def download_single_paper(paper):
     # Create singlepaper folder path
-    folder_name = os.path.join(BASE_PATH, "singlepaper")
-    if not os.path.exists(folder_name):
-        os.makedirs(folder_name)
+    folder_name = get_download_folder("singlepaper")
 
     # Download the paper
     result = download_pdf(paper, folder_name)
@@ -161,4 +221,180 @@ def download_single_paper(paper):
         bibtex_content = generate_bibtex([paper])  # Pass a list with the single paper
         save_bibtex_file(bibtex_content, folder_name)
     else:
-        st.error(f"Failed to download '{paper['title']}'")
\ No newline at end of file
+        st.error(f"Failed to download '{paper['title']}'")
+
+# Write-only sink that hands zipfile output back to the caller in chunks
+class _ZipChunkSink:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b"".join(chunks)
+
+
+# Function to find an already downloaded copy of a paper on disk
+def find_local_pdf(paper, query=None):
+    sanitized_title = sanitize_filename(paper['title'])
+    folders = [bulk_folder_path(query), os.path.join(get_base_path(), "singlepaper")]
+
+    for folder in folders:
+        file_path = os.path.join(folder, f"{sanitized_title}.pdf")
+        if os.path.isfile(file_path) and os.path.getsize(file_path) > 10 * 1024:
+            return file_path
+    return None
+
+
+# Function to copy a file on disk into an open ZIP entry, yielding the archive bytes as they are produced
+def _copy_into_zip(file_path, entry, sink):
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(ZIP_CHUNK_SIZE)
+            if not chunk:
+                break
+            entry.write(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+
+
+# Function to stream a ZIP archive of the selected papers and their BibTeX file chunk by chunk
+def iter_zip_export(papers, query=None):
+    sink = _ZipChunkSink()
+    used_names = set()
+    exported = []
+    failed = []
+
+    with tempfile.TemporaryDirectory() as staging_dir, zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as zf:
+        for paper in papers:
+            # Papers not on disk yet are staged one at a time, so a failed download never reaches the archive
+            file_path = find_local_pdf(paper, query)
+            if file_path is None:
+                file_path = os.path.join(staging_dir, "paper.pdf")
+                try:
+                    downloaded = fetch_pdf_to_file(paper, file_path)
+                except Exception as e:
+                    logger.warning("Error downloading '%s' for ZIP export: %s", paper['title'], e)
+                    downloaded = False
+                if not downloaded:
+                    failed.append(paper)
+                    continue
+
+            base_name = sanitize_filename(paper['title']) or paper.get('arxiv_id', 'paper')
+            arcname = f"{base_name}.pdf"
+            suffix = 1
+            while arcname in used_names:
+                suffix += 1
+                arcname = f"{base_name}_{suffix}.pdf"
+            used_names.add(arcname)
+
+            with zf.open(arcname, mode='w', force_zip64=True) as entry:
+                yield from _copy_into_zip(file_path, entry, sink)
+            exported.append(paper)
+
+            if file_path.startswith(staging_dir):
+                os.remove(file_path)
+
+            data = sink.drain()
+            if data:
+                yield data
+
+        bibtex_content = generate_bibtex(exported)
+        zf.writestr("arxiv_papers.bib", bibtex_content, compress_type=zipfile.ZIP_DEFLATED)
+
+        if failed:
+            failed_list = "\n".join(f"{paper['title']} ({paper['pdf_url']})" for paper in failed)
+            zf.writestr("failed_downloads.txt", failed_list + "\n", compress_type=zipfile.ZIP_DEFLATED)
+
+    # Central directory is written when the archive is closed
+    data = sink.drain()
+    if data:
+        yield data
+
+
+# Process-wide registry of pending ZIP exports, served by the route from zip_export_route()
+_zip_exports = {}
+_zip_exports_lock = threading.Lock()
+# URL path the export route is mounted at, including server.baseUrlPath; None until mounted
+_zip_export_url_path = None
+
+
+# Function to register a selection for export and return the token used in its download URL
+def register_zip_export(papers, query):
+    token = secrets.token_urlsafe(16)
+    now = time()
+    arxiv_ids = tuple(paper['arxiv_id'] for paper in papers)
+    with _zip_exports_lock:
+        for expired in [key for key, export in _zip_exports.items() if now - export[2] > ZIP_EXPORT_TTL]:
+            del _zip_exports[expired]
+        _zip_exports[token] = (arxiv_ids, query, now)
+    return token
+
+
+# Function to look up a registered export by token
+def get_zip_export(token):
+    with _zip_exports_lock:
+        export = _zip_exports.get(token)
+    if export is None or time() - export[2] > ZIP_EXPORT_TTL:
+        return None
+    return export
+
+
+# Function to name the archive after the query and date
+def zip_export_filename(query):
+    sanitized_query = sanitize_filename(query or "") or "arxiv_papers"
+    return f"{sanitized_query}_{datetime.now().strftime('%Y-%m-%d')}.zip"
+
+
+# Function to build an attachment header that stays latin-1 encodable for non-ASCII file names
+def content_disposition(file_name):
+    # ASCII fallback for old clients, RFC 5987 filename* with the real name for everyone else
+    ascii_name = file_name.encode('ascii', 'replace').decode('ascii').replace('?', '_').replace('"', '_')
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(file_name)}"
+
+
+# Starlette endpoint that streams a registered export straight to the client
+def _serve_zip_export(request):
+    from starlette.responses import PlainTextResponse, StreamingResponse
+
+    export = get_zip_export(request.path_params['token'])
+    if export is None:
+        return PlainTextResponse("Export not found or expired.", status_code=404)
+
+    arxiv_ids, query, _ = export
+    papers = hydrate_papers(arxiv_ids, query)
+    return StreamingResponse(
+        iter_zip_export(papers, query),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(zip_export_filename(query))},
+    )
+
+
+# Function to build the route that serves ZIP exports; mount it with st.App (see server.py)
+def zip_export_route():
+    from starlette.routing import Route
+
+    global _zip_export_url_path
+    # st.App mounts user routes as given, so apply the base URL prefix Streamlit uses for its own routes
+    base_url = (st.get_option("server.baseUrlPath") or "").strip("/")
+    _zip_export_url_path = f"/{base_url}{ZIP_EXPORT_PATH}" if base_url else ZIP_EXPORT_PATH
+    return Route(f"{_zip_export_url_path}/{{token}}", _serve_zip_export, methods=["GET"])
+
+
+# Function to offer the selected papers as a ZIP download in the browser
+def zip_export(papers, query):
+    if _zip_export_url_path is None:
+        st.error("ZIP export needs the streaming route. Start the app with `streamlit run server.py`.")
+        return
+
+    token = register_zip_export(papers, query)
+    zip_name = zip_export_filename(query)
+    st.link_button(f"Download {zip_name}", f"{_zip_export_url_path}/{token}")
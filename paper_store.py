@@ -0,0 +1,164 @@
+import sys
+import threading
+from collections import OrderedDict
+from arxiv_fetcher import (
+    fetch_papers_by_ids,
+    get_all_cached_results,
+    get_cached_results,
+    get_stored_papers,
+    save_cached_results,
+    save_stored_papers,
+    split_arxiv_id,
+)
+
+# Maximum number of papers kept in the process-wide store
+MAX_STORED_PAPERS = 5000
+
+
+# Function to get the version number of a paper dict (0 when unversioned)
+def paper_version(paper):
+    return split_arxiv_id(paper.get('arxiv_id') or paper['arxiv_url'])[1] or 0
+
+
+# Process-wide, bounded store of paper metadata shared by all sessions, keyed by unversioned arxiv id
+class PaperStore:
+    def __init__(self, max_papers=MAX_STORED_PAPERS):
+        self.max_papers = max_papers
+        self._papers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._papers)
+
+    def __contains__(self, arxiv_id):
+        return split_arxiv_id(arxiv_id)[0] in self._papers
+
+    def put(self, paper):
+        arxiv_id = sys.intern(split_arxiv_id(paper.get('arxiv_id') or paper['arxiv_url'])[0])
+        paper = dict(paper)
+
+        # summary and abstract carry the same text, keep a single copy of it
+        if paper.get('abstract') == paper.get('summary'):
+            paper['abstract'] = paper['summary']
+
+        with self._lock:
+            # Never replace a newer version with an older copy, e.g. from a stale cached search
+            current = self._papers.get(arxiv_id)
+            if current is None or paper_version(paper) >= paper_version(current):
+                self._papers[arxiv_id] = paper
+            self._papers.move_to_end(arxiv_id)
+            while len(self._papers) > self.max_papers:
+                self._papers.popitem(last=False)
+        return arxiv_id
+
+    def put_many(self, papers):
+        return tuple(self.put(paper) for paper in papers)
+
+    def get(self, arxiv_id):
+        arxiv_id = split_arxiv_id(arxiv_id)[0]
+        with self._lock:
+            paper = self._papers.get(arxiv_id)
+            if paper is not None:
+                self._papers.move_to_end(arxiv_id)
+            return paper
+
+    def get_many(self, arxiv_ids):
+        return [self.get(arxiv_id) for arxiv_id in arxiv_ids]
+
+
+# Shared store instance; module state lives for the whole server process
+paper_store = PaperStore()
+
+
+# Function to add papers to the shared store and return their compact ids for session state
+def store_papers(papers):
+    return paper_store.put_many(papers)
+
+
+# Function to turn session ids back into paper dicts, reloading evicted papers from the database
+def hydrate_papers(arxiv_ids, query=None):
+    papers = paper_store.get_many(arxiv_ids)
+    missing = [arxiv_id for arxiv_id, paper in zip(arxiv_ids, papers) if paper is None]
+    if missing:
+        paper_store.put_many(get_stored_papers(missing).values())
+        missing = [arxiv_id for arxiv_id in missing if arxiv_id not in paper_store]
+        if query and missing:
+            # Only the requested ids go back into the store, so other sessions' pages are not evicted
+            wanted = {split_arxiv_id(arxiv_id)[0] for arxiv_id in missing}
+            paper_store.put_many(
+                paper for paper in get_cached_results(query) or []
+                if split_arxiv_id(paper['arxiv_id'])[0] in wanted
+            )
+        papers = paper_store.get_many(arxiv_ids)
+    return [paper for paper in papers if paper is not None]
+
+
+# Function to find papers whose fetched version is newer than the known one
+def find_new_versions(known_papers, fetched_papers):
+    updates = []
+    for base_id, paper in fetched_papers.items():
+        known = known_papers.get(base_id)
+        if known is None:
+            continue
+        if paper_version(paper) > paper_version(known):
+            updates.append((known['arxiv_id'], paper['arxiv_id']))
+    return updates
+
+
+# Function to fetch arxiv ids in batches and merge the fresh metadata into the paper cache
+def refresh_papers(arxiv_ids, known_papers=None):
+    """
+    Returns:
+        fetched (dict): Fresh paper dicts keyed by unversioned arxiv id.
+        updates (list): (old_id, new_id) pairs for papers with a newer version than the cached one.
+    """
+    fetched = fetch_papers_by_ids(arxiv_ids)
+    if not fetched:
+        return {}, []
+
+    # Compare against the highest version known before this lookup, on disk, in memory or from the caller
+    known = get_stored_papers(fetched.keys())
+    sources = [{base_id: paper_store.get(base_id) for base_id in fetched}, known_papers or {}]
+    for source in sources:
+        for base_id, paper in source.items():
+            if paper is not None and (base_id not in known or paper_version(paper) > paper_version(known[base_id])):
+                known[base_id] = paper
+    updates = find_new_versions(known, fetched)
+
+    save_stored_papers(fetched.values())
+    paper_store.put_many(fetched.values())
+    return fetched, updates
+
+
+# Function to look up a reading list of arxiv ids and return compact ids for session state
+def lookup_papers(arxiv_ids):
+    fetched, updates = refresh_papers(arxiv_ids)
+    found = dict.fromkeys(
+        base_id for base_id in (split_arxiv_id(arxiv_id)[0] for arxiv_id in arxiv_ids) if base_id in fetched
+    )
+    return tuple(sys.intern(base_id) for base_id in found), updates
+
+
+# Function to re-validate every cached search result against arXiv and refresh stale metadata
+def refresh_cached_results():
+    """
+    Returns:
+        updates (list): (old_id, new_id) pairs for papers that gained a new version.
+    """
+    cached_results = get_all_cached_results()
+    known = {}
+    for papers in cached_results.values():
+        for paper in papers:
+            known[split_arxiv_id(paper['arxiv_id'])[0]] = paper
+
+    fetched, updates = refresh_papers(list(known), known)
+
+    # Rewrite cached search results with the refreshed metadata, keeping their original category label
+    for query, papers in cached_results.items():
+        refreshed = []
+        for paper in papers:
+            fresh_paper = fetched.get(split_arxiv_id(paper['arxiv_id'])[0])
+            refreshed.append(dict(fresh_paper, category=paper.get('category', 'N/A')) if fresh_paper else paper)
+        if refreshed != papers:
+            save_cached_results(query, refreshed)
+    return updates
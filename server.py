@@ -0,0 +1,13 @@
+# server.py
+#
+# ASGI entry point: runs app.py with the extra routes it needs.
+# Start with `streamlit run server.py` (or `uvicorn server:app`).
+#
+# The ZIP export route is mounted under server.baseUrlPath, like Streamlit's own routes.
+# Set it in .streamlit/config.toml, STREAMLIT_SERVER_BASE_URL_PATH or on the command line,
+# because it is read when this module builds the route.
+
+import streamlit as st
+from paper_download import zip_export_route
+
+app = st.App("app.py", routes=[zip_export_route()])
@@ -1,8 +1,8 @@
 import streamlit as st
 
-# Function to initialize session state
+# Function to initialize session state (papers hold arxiv ids, see paper_store)
 def initialize_session_state():
     if 'papers' not in st.session_state:
-        st.session_state.papers = []
+        st.session_state.papers = ()
     if 'selected_papers' not in st.session_state:
-        st.session_state.selected_papers = []
\ No newline at end of file
+        st.session_state.selected_papers = ()
\ No newline at end of file